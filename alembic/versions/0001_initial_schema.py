@@ -0,0 +1,79 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15
+
+Matches the tables previously created by Base.metadata.create_all.
+Tables that already exist (databases created that way) are left untouched,
+so the first `alembic upgrade head` on such a database just records 0001.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if op.get_context().as_sql:  # Offline (--sql) mode has no database to inspect
+        existing_tables = set()
+    else:
+        existing_tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "vehicles" not in existing_tables:
+        _create_vehicles()
+    if "service_types" not in existing_tables:
+        _create_service_types()
+    if "service_records" not in existing_tables:
+        _create_service_records()
+
+def _create_vehicles():
+    op.create_table(
+        "vehicles",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("vehicle_number", sa.String(length=50), nullable=False),
+        sa.Column("owner_name", sa.String(length=100), nullable=False),
+        sa.Column("model", sa.String(length=100), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_vehicles_id", "vehicles", ["id"])
+    op.create_index("ix_vehicles_vehicle_number", "vehicles", ["vehicle_number"], unique=True)
+
+def _create_service_types():
+    op.create_table(
+        "service_types",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("interval_days", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_service_types_id", "service_types", ["id"])
+    op.create_index("ix_service_types_name", "service_types", ["name"], unique=True)
+
+def _create_service_records():
+    op.create_table(
+        "service_records",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("vehicle_id", sa.Integer(), nullable=False),
+        sa.Column("service_type_id", sa.Integer(), nullable=False),
+        sa.Column("service_date", sa.DateTime(), nullable=False),
+        sa.Column("next_service_date", sa.DateTime(), nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["vehicle_id"], ["vehicles.id"]),
+        sa.ForeignKeyConstraint(["service_type_id"], ["service_types.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_service_records_id", "service_records", ["id"])
+    op.create_index("ix_service_records_vehicle_id", "service_records", ["vehicle_id"])
+    op.create_index("ix_service_records_service_type_id", "service_records", ["service_type_id"])
+    op.create_index("ix_service_records_service_date", "service_records", ["service_date"])
+    op.create_index("ix_service_records_next_service_date", "service_records", ["next_service_date"])
+
+def downgrade():
+    op.drop_table("service_records")
+    op.drop_table("service_types")
+    op.drop_table("vehicles")
@@ -0,0 +1,36 @@
+"""Composite index on service_records (vehicle_id, service_date DESC)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15
+
+Built CONCURRENTLY so existing tables stay writable; skipped if create_all
+already created it.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_sr_vehicle_servicedate",
+            "service_records",
+            ["vehicle_id", sa.text("service_date DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_sr_vehicle_servicedate",
+            table_name="service_records",
+            postgresql_concurrently=True,
+            if_exists=True
+        )
@@ -2,15 +2,19 @@
 CRUD Operations
 Database operations for Vehicle, ServiceType, and ServiceRecord
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from datetime import datetime
-from typing import List, Optional
+from cachetools import TTLCache
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+from sqlalchemy.orm import contains_eager
+from sqlalchemy import and_, bindparam, case, exists, func, insert, lambda_stmt, literal, select, true, DateTime, Integer, Interval, Text
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.engine import Row
+from datetime import datetime, timedelta
+from typing import List, Optional, Union
 from app import models, schemas
 
 # ==================== Vehicle CRUD ====================
 
-def create_vehicle(db: Session, vehicle: schemas.VehicleCreate) -> models.Vehicle:
+async def create_vehicle(db: AsyncSession, vehicle: schemas.VehicleCreate) -> models.Vehicle:
     """Create a new vehicle"""
     db_vehicle = models.Vehicle(
         vehicle_number=vehicle.vehicle_number,
@@ -18,113 +22,356 @@ def create_vehicle(db: Session, vehicle: schemas.VehicleCreate) -> models.Vehicl
         model=vehicle.model
     )
     db.add(db_vehicle)
-    db.commit()
-    db.refresh(db_vehicle)
+    await db.commit()
+    await db.refresh(db_vehicle)
     return db_vehicle
 
-def get_vehicle(db: Session, vehicle_id: int) -> Optional[models.Vehicle]:
+async def get_vehicle(db: AsyncSession, vehicle_id: int) -> Optional[models.Vehicle]:
     """Get vehicle by ID"""
-    return db.query(models.Vehicle).filter(models.Vehicle.id == vehicle_id).first()
+    return await db.scalar(select(models.Vehicle).where(models.Vehicle.id == vehicle_id))
 
-def get_vehicle_by_number(db: Session, vehicle_number: str) -> Optional[models.Vehicle]:
+async def vehicle_exists(db: AsyncSession, vehicle_id: int) -> bool:
+    """Check whether a vehicle exists without loading the row"""
+    return await db.scalar(select(exists().where(models.Vehicle.id == vehicle_id))) is True
+
+async def get_vehicle_by_number(db: AsyncSession, vehicle_number: str) -> Optional[models.Vehicle]:
     """Get vehicle by vehicle number"""
-    return db.query(models.Vehicle).filter(models.Vehicle.vehicle_number == vehicle_number).first()
+    return await db.scalar(select(models.Vehicle).where(models.Vehicle.vehicle_number == vehicle_number))
 
-def get_vehicles(db: Session, skip: int = 0, limit: int = 100) -> List[models.Vehicle]:
+async def get_vehicles(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[models.Vehicle]:
     """Get all vehicles with pagination"""
-    return db.query(models.Vehicle).offset(skip).limit(limit).all()
+    return (await db.scalars(select(models.Vehicle).offset(skip).limit(limit))).all()
 
-def delete_vehicle(db: Session, vehicle_id: int) -> bool:
+async def delete_vehicle(db: AsyncSession, vehicle_id: int) -> bool:
     """Delete a vehicle"""
-    vehicle = get_vehicle(db, vehicle_id)
+    vehicle = await get_vehicle(db, vehicle_id)
     if vehicle:
-        db.delete(vehicle)
-        db.commit()
+        await db.delete(vehicle)
+        await db.commit()
+        _stats_cache.clear()
         return True
     return False
 
 # ==================== ServiceType CRUD ====================
 
-def create_service_type(db: Session, service_type: schemas.ServiceTypeCreate) -> models.ServiceType:
+async def create_service_type(db: AsyncSession, service_type: schemas.ServiceTypeCreate) -> models.ServiceType:
     """Create a new service type"""
     db_service_type = models.ServiceType(
         name=service_type.name,
         interval_days=service_type.interval_days
     )
     db.add(db_service_type)
-    db.commit()
-    db.refresh(db_service_type)
+    await db.commit()
+    await db.refresh(db_service_type)
+    _types_cache.clear()
     return db_service_type
 
-def get_service_type(db: Session, service_type_id: int) -> Optional[models.ServiceType]:
+async def get_service_type(db: AsyncSession, service_type_id: int) -> Optional[models.ServiceType]:
     """Get service type by ID"""
-    return db.query(models.ServiceType).filter(models.ServiceType.id == service_type_id).first()
+    return await db.scalar(select(models.ServiceType).where(models.ServiceType.id == service_type_id))
+
+# Short-lived cache of the full service type list (cleared by create_service_type)
+_types_cache = TTLCache(maxsize=1, ttl=60)
 
-def get_service_types(db: Session) -> List[models.ServiceType]:
-    """Get all service types"""
-    return db.query(models.ServiceType).all()
+async def get_service_types(db: AsyncSession) -> List[models.ServiceType]:
+    """Get all service types (cached for up to 60 seconds)"""
+    service_types = _types_cache.get("all")
+    if service_types is None:
+        service_types = (await db.scalars(select(models.ServiceType))).all()
+        _types_cache["all"] = service_types
+    return service_types
 
 # ==================== ServiceRecord CRUD ====================
 
-def create_service_record(db: Session, service_record: schemas.ServiceRecordCreate) -> models.ServiceRecord:
+def _now_param():
+    """Named bind parameter for the current time, supplied at execute time"""
+    return bindparam("now", type_=DateTime)
+
+def _future_param():
+    """Named bind parameter for the end of the upcoming window, supplied at execute time"""
+    return bindparam("future", type_=DateTime)
+
+def _status_expressions(now: Union[datetime, ColumnElement]):
+    """
+    SQL expressions for service status and days until due
+    Mirrors Python's timedelta.days (floor) so negative values mean overdue
+
+    Status values:
+    - OVERDUE: next_service_date is in the past
+    - DUE: next_service_date is today or within 7 days
+    - UPCOMING: next_service_date is more than 7 days away
+    """
+    days_until_due = func.floor(
+        func.extract("epoch", models.ServiceRecord.next_service_date - now) / 86400
+    ).cast(Integer)
+    status = case(
+        (days_until_due < 0, "OVERDUE"),
+        (days_until_due <= 7, "DUE"),
+        else_="UPCOMING"
+    )
+    return status, days_until_due
+
+def _status_columns(now: Union[datetime, ColumnElement]):
+    """Status expressions labelled as status / days_until_due result columns"""
+    status, days_until_due = _status_expressions(now)
+    return status.label("status"), days_until_due.label("days_until_due")
+
+def _status_options(now: Union[datetime, ColumnElement], load):
+    """
+    Loader options populating ServiceRecord.status / days_until_due
+    load is the loader path to the records (e.g. contains_eager(Vehicle.service_records))
+    """
+    status, days_until_due = _status_expressions(now)
+    return (
+        load.with_expression(models.ServiceRecord.status, status),
+        load.with_expression(models.ServiceRecord.days_until_due, days_until_due)
+    )
+
+def _range_predicate(
+    col,
+    start: Union[datetime, ColumnElement, None] = None,
+    end: Union[datetime, ColumnElement, None] = None
+):
+    """
+    Half-open date range filter: start <= col < end (either bound may be omitted)
+    Compares the bare column so the predicate stays sargable and can use its index.
+    Never wrap an indexed date column in func.date() or a cast; for a single day
+    use start=day_start, end=day_start + timedelta(days=1) instead.
+    Bounds may be datetimes or existing bind parameters (for lambda statements)
+    """
+    def bound(value, suffix):
+        if isinstance(value, ColumnElement):
+            return value
+        return bindparam(f"{col.key}_{suffix}", value, type_=col.type, unique=True)
+
+    clauses = []
+    if start is not None:
+        clauses.append(col >= bound(start, "start"))
+    if end is not None:
+        clauses.append(col < bound(end, "end"))
+    return and_(*clauses)
+
+async def create_service_record(
+    db: AsyncSession,
+    service_record: schemas.ServiceRecordCreate
+) -> Optional[models.ServiceRecord]:
     """
     Create a new service record
     Automatically calculates next_service_date based on service_date + interval_days
-    """
-    # Get service type to retrieve interval_days
-    service_type = get_service_type(db, service_record.service_type_id)
-    if not service_type:
-        raise ValueError(f"Service type {service_record.service_type_id} not found")
     
-    # Calculate next service date using timedelta
-    from datetime import timedelta
-    next_service = service_record.service_date + timedelta(days=service_type.interval_days)
+    Runs as a single INSERT ... SELECT ... RETURNING: the SELECT only yields a row
+    when both the vehicle and the service type exist, so nothing is inserted and
+    None is returned if either is missing
+    """
+    service_date = literal(service_record.service_date, DateTime)
+    source = select(
+        models.Vehicle.id,
+        models.ServiceType.id,
+        service_date,
+        service_date + func.make_interval(0, 0, 0, models.ServiceType.interval_days, type_=Interval),
+        literal(service_record.notes, Text),
+        literal(datetime.utcnow(), DateTime)
+    )\
+        .select_from(models.Vehicle)\
+        .join(models.ServiceType, true())\
+        .where(
+            models.Vehicle.id == service_record.vehicle_id,
+            models.ServiceType.id == service_record.service_type_id
+        )
+    stmt = insert(models.ServiceRecord)\
+        .from_select(
+            ["vehicle_id", "service_type_id", "service_date", "next_service_date", "notes", "created_at"],
+            source
+        )\
+        .returning(models.ServiceRecord)
     
-    db_service_record = models.ServiceRecord(
-        vehicle_id=service_record.vehicle_id,
-        service_type_id=service_record.service_type_id,
-        service_date=service_record.service_date,
-        next_service_date=next_service,
-        notes=service_record.notes
-    )
-    db.add(db_service_record)
-    db.commit()
-    db.refresh(db_service_record)
+    db_service_record = (await db.execute(stmt)).scalar_one_or_none()
+    await db.commit()
+    if db_service_record is not None:
+        _stats_cache.clear()
     return db_service_record
 
-def get_service_records_by_vehicle(db: Session, vehicle_id: int) -> List[models.ServiceRecord]:
-    """Get all service records for a specific vehicle"""
-    return db.query(models.ServiceRecord)\
-        .filter(models.ServiceRecord.vehicle_id == vehicle_id)\
-        .order_by(models.ServiceRecord.service_date.desc())\
-        .all()
+async def create_service_records_bulk(
+    db: AsyncSession,
+    service_records: List[schemas.ServiceRecordCreate]
+) -> List[models.ServiceRecord]:
+    """
+    Create many service records in one executemany INSERT ... RETURNING
+    Interval days for all referenced service types are fetched in a single SELECT
+    """
+    if not service_records:
+        return []
+    
+    type_ids = {record.service_type_id for record in service_records}
+    intervals = dict((await db.execute(
+        select(models.ServiceType.id, models.ServiceType.interval_days)
+        .where(models.ServiceType.id.in_(type_ids))
+    )).all())
+    missing = type_ids - intervals.keys()
+    if missing:
+        raise ValueError(f"Service type {min(missing)} not found")
+    
+    rows = [
+        {
+            "vehicle_id": record.vehicle_id,
+            "service_type_id": record.service_type_id,
+            "service_date": record.service_date,
+            "next_service_date": record.service_date + timedelta(days=intervals[record.service_type_id]),
+            "notes": record.notes
+        }
+        for record in service_records
+    ]
+    db_service_records = (await db.scalars(
+        insert(models.ServiceRecord).returning(models.ServiceRecord),
+        rows
+    )).all()
+    await db.commit()
+    _stats_cache.clear()
+    return db_service_records
 
-def get_all_service_records(db: Session, skip: int = 0, limit: int = 100) -> List[models.ServiceRecord]:
-    """Get all service records with pagination"""
-    return db.query(models.ServiceRecord)\
+async def get_vehicle_with_history(db: AsyncSession, vehicle_id: int) -> Optional[models.Vehicle]:
+    """
+    Get a vehicle with its service records (newest first) and their service types
+    Everything is loaded by one joined query via contains_eager
+    """
+    records = contains_eager(models.Vehicle.service_records)
+    stmt = select(models.Vehicle)\
+        .outerjoin(models.Vehicle.service_records)\
+        .outerjoin(models.ServiceRecord.service_type)\
+        .options(
+            records.contains_eager(models.ServiceRecord.service_type),
+            *_status_options(datetime.utcnow(), records)
+        )\
+        .where(models.Vehicle.id == vehicle_id)\
+        .order_by(models.ServiceRecord.service_date.desc())
+    return (await db.execute(stmt)).unique().scalar_one_or_none()
+
+def _detail_select(now: Union[datetime, ColumnElement, None] = None):
+    """
+    Flat select of every ServiceRecordDetailResponse field
+    Joins vehicles and service_types in one query and returns plain rows,
+    skipping ORM hydration entirely
+    """
+    if now is None:
+        now = datetime.utcnow()
+    status, days_until_due = _status_columns(now)
+    return select(
+        models.ServiceRecord.id,
+        models.ServiceRecord.vehicle_id,
+        models.Vehicle.vehicle_number,
+        models.Vehicle.owner_name,
+        models.Vehicle.model,
+        models.ServiceRecord.service_type_id,
+        models.ServiceType.name.label("service_type_name"),
+        models.ServiceRecord.service_date,
+        models.ServiceRecord.next_service_date,
+        models.ServiceRecord.notes,
+        status,
+        days_until_due
+    )\
+        .join(models.Vehicle, models.ServiceRecord.vehicle_id == models.Vehicle.id)\
+        .join(models.ServiceType, models.ServiceRecord.service_type_id == models.ServiceType.id)
+
+async def list_detailed_records(
+    db: AsyncSession,
+    *criteria,
+    now: Optional[datetime] = None,
+    skip: int = 0,
+    limit: Optional[int] = None
+) -> List[Row]:
+    """
+    Get flat detail rows matching the given filter criteria,
+    ordered by next_service_date
+    """
+    stmt = _detail_select(now)\
+        .where(*criteria)\
         .order_by(models.ServiceRecord.next_service_date.asc())\
         .offset(skip)\
-        .limit(limit)\
-        .all()
+        .limit(limit)
+    return (await db.execute(stmt)).all()
 
-def get_overdue_services(db: Session) -> List[models.ServiceRecord]:
+async def get_all_service_records(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Row]:
+    """Get all service records with pagination"""
+    return await list_detailed_records(db, skip=skip, limit=limit)
+
+async def get_overdue_services(db: AsyncSession) -> List[Row]:
     """Get all overdue service records"""
-    now = datetime.utcnow()
-    return db.query(models.ServiceRecord)\
-        .filter(models.ServiceRecord.next_service_date < now)\
-        .order_by(models.ServiceRecord.next_service_date.asc())\
-        .all()
+    # lambda_stmt caches the built statement; values are passed as bind parameters.
+    # Build bind parameters through helpers: globals referenced directly inside
+    # the lambda (e.g. DateTime) are tracked as closure values and break compilation
+    stmt = lambda_stmt(lambda: _detail_select(_now_param())
+        .where(_range_predicate(models.ServiceRecord.next_service_date, end=_now_param()))
+        .order_by(models.ServiceRecord.next_service_date.asc()))
+    return (await db.execute(stmt, {"now": datetime.utcnow()})).all()
 
-def get_upcoming_services(db: Session, days_ahead: int = 30) -> List[models.ServiceRecord]:
+async def get_upcoming_services(db: AsyncSession, days_ahead: int = 30) -> List[Row]:
     """Get upcoming services within specified days"""
-    from datetime import timedelta
     now = datetime.utcnow()
     future = now + timedelta(days=days_ahead)
     
-    return db.query(models.ServiceRecord)\
-        .filter(and_(
-            models.ServiceRecord.next_service_date >= now,
-            models.ServiceRecord.next_service_date <= future
-        ))\
-        .order_by(models.ServiceRecord.next_service_date.asc())\
-        .all()
\ No newline at end of file
+    stmt = lambda_stmt(lambda: _detail_select(_now_param())
+        .where(_range_predicate(
+            models.ServiceRecord.next_service_date,
+            _now_param(),
+            _future_param()
+        ))
+        .order_by(models.ServiceRecord.next_service_date.asc()))
+    return (await db.execute(stmt, {"now": now, "future": future})).all()
+
+# Short-lived cache for dashboard counters (cleared on record writes)
+_stats_cache = TTLCache(maxsize=1, ttl=60)
+
+async def get_overdue_count(db: AsyncSession) -> int:
+    """Count overdue service records (cached for up to 60 seconds)"""
+    overdue_count = _stats_cache.get("overdue")
+    if overdue_count is None:
+        overdue_count = await db.scalar(
+            select(func.count())
+            .select_from(models.ServiceRecord)
+            .where(_range_predicate(models.ServiceRecord.next_service_date, end=datetime.utcnow()))
+        )
+        _stats_cache["overdue"] = overdue_count
+    return overdue_count
+
+async def get_vehicle_history_version(db: AsyncSession, vehicle_id: int) -> tuple:
+    """
+    Cheap fingerprint of a vehicle's service history response
+    (vehicle exists, record count, max record id, sum of days until due);
+    days until due only ever decreases, so the sum changes whenever any
+    record's status or days_until_due does
+    """
+    _, days_until_due = _status_expressions(datetime.utcnow())
+    row = (await db.execute(
+        select(
+            exists().where(models.Vehicle.id == vehicle_id).label("vehicle_exists"),
+            func.count(models.ServiceRecord.id),
+            func.max(models.ServiceRecord.id),
+            func.sum(days_until_due)
+        ).where(models.ServiceRecord.vehicle_id == vehicle_id)
+    )).one()
+    return tuple(row)
+
+async def get_all_service_records_stream(
+    db: AsyncSession,
+    vehicle_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    batch: int = 1000
+) -> AsyncResult:
+    """
+    Stream flat service record rows for CSV export
+    Uses the same joined Core select as the detail endpoints,
+    so no ORM objects or relationship loads are involved.
+    Rows come from a server-side cursor, batch rows at a time,
+    so memory stays flat regardless of result size
+    """
+    stmt = _detail_select()
+
+    if vehicle_id is not None:
+        stmt = stmt.where(models.ServiceRecord.vehicle_id == vehicle_id)\
+            .order_by(models.ServiceRecord.service_date.desc())
+    else:
+        stmt = stmt.order_by(models.ServiceRecord.next_service_date.asc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    return await db.stream(stmt.execution_options(stream_results=True, yield_per=batch))
@@ -1,11 +1,11 @@
 """
 Database Configuration
-Handles PostgreSQL connection via SQLAlchemy using Supabase
+Handles PostgreSQL connection via async SQLAlchemy + asyncpg using Supabase
 """
 import os
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -21,28 +21,56 @@ DATABASE_URL = os.getenv(
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+# Use the asyncpg driver
+if DATABASE_URL.startswith("postgresql://"):
+    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+# Connection pool settings (per worker process)
+# Keep workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below Postgres max_connections;
+# for many workers, put PgBouncer in front and point DATABASE_URL at it
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Seconds
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds
+
+# Set when DATABASE_URL goes through a transaction-mode PgBouncer
+# (e.g. Supabase pooler on port 6543): PgBouncer does the pooling, so the app must not
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+
 # Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before using
-    pool_size=10,
-    max_overflow=20
-)
+if DB_PGBOUNCER:
+    engine = create_async_engine(
+        DATABASE_URL,
+        poolclass=NullPool,
+        # Prepared statements don't survive transaction-mode PgBouncer
+        connect_args={
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0
+        }
+    )
+else:
+    engine = create_async_engine(
+        DATABASE_URL,
+        pool_pre_ping=True,  # Verify connections before using
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT
+    )
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False keeps RETURNING-loaded rows usable after commit
+# without an implicit refresh SELECT
+SessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=engine, class_=AsyncSession)
 
 # Create base class for models
 Base = declarative_base()
 
 # Dependency for route handlers to get DB session
-def get_db():
+async def get_db():
     """
     Yields a database session and ensures it's closed after use
     Used as a dependency in FastAPI routes
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+    async with SessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -2,8 +2,8 @@
 Database Models
 SQLAlchemy ORM models for Vehicle, ServiceType, and ServiceRecord
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
+from sqlalchemy.orm import query_expression, relationship
 from datetime import datetime
 from app.database import Base
 
@@ -51,4 +51,15 @@ class ServiceRecord(Base):
     
     # Relationships
     vehicle = relationship("Vehicle", back_populates="service_records")
-    service_type = relationship("ServiceType", back_populates="service_records")
\ No newline at end of file
+    service_type = relationship("ServiceType", back_populates="service_records")
+    
+    # Computed in SQL per query via with_expression (see crud._status_options)
+    status = query_expression()
+    days_until_due = query_expression()
+    
+    # Composite index matching the per-vehicle queries (filter + order by):
+    # crud.get_vehicle_with_history and the per-vehicle CSV export stream
+    # next_service_date already has its own index via index=True
+    __table_args__ = (
+        Index("ix_sr_vehicle_servicedate", "vehicle_id", service_date.desc()),
+    )
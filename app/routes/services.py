@@ -2,25 +2,50 @@
 Service Routes
 REST API endpoints for service types and service records
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
-from typing import List
+import hashlib
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app import schemas, crud
 from app.database import get_db
 from app.services.service_logic import (
-    build_service_detail_response,
+    build_service_detail_response_from_row,
     build_service_history,
     generate_csv_data
 )
 
 router = APIRouter()
 
+CACHE_CONTROL = "private, must-revalidate"
+
+def _etag(version) -> str:
+    """Build a weak ETag from a data version fingerprint"""
+    return 'W/"%s"' % hashlib.sha1(repr(version).encode()).hexdigest()[:20]
+
+def _not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Set caching headers on the response, and return a 304 response
+    if the client's If-None-Match already matches etag
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags or etag[2:] in tags:
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+            )
+    return None
+
 # ==================== Service Type Endpoints ====================
 
 @router.post("/types", response_model=schemas.ServiceTypeResponse, status_code=status.HTTP_201_CREATED)
-def create_service_type(
+async def create_service_type(
     service_type: schemas.ServiceTypeCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new service type
@@ -28,19 +53,32 @@ def create_service_type(
     - **name**: Service name (e.g., "Oil Change", "Brake Inspection")
     - **interval_days**: Days between services
     """
-    return crud.create_service_type(db, service_type)
+    return await crud.create_service_type(db, service_type)
 
 @router.get("/types", response_model=List[schemas.ServiceTypeResponse])
-def list_service_types(db: Session = Depends(get_db)):
-    """Get all available service types"""
-    return crud.get_service_types(db)
+async def list_service_types(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get all available service types
+    Supports If-None-Match; service types are never updated, so the
+    highest ID and count identify the list
+    """
+    service_types = await crud.get_service_types(db)
+    etag = _etag((max((t.id for t in service_types), default=None), len(service_types)))
+    not_modified = _not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    return service_types
 
 # ==================== Service Record Endpoints ====================
 
 @router.post("/records", response_model=schemas.ServiceRecordResponse, status_code=status.HTTP_201_CREATED)
-def create_service_record(
+async def create_service_record(
     service_record: schemas.ServiceRecordCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new service record
@@ -53,97 +91,103 @@ def create_service_record(
     - **service_date**: When the service was performed
     - **notes**: Optional notes about the service
     """
-    # Validate vehicle exists
-    vehicle = crud.get_vehicle(db, service_record.vehicle_id)
-    if not vehicle:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Vehicle with ID {service_record.vehicle_id} not found"
-        )
-    
-    # Validate service type exists
-    service_type = crud.get_service_type(db, service_record.service_type_id)
-    if not service_type:
+    db_service_record = await crud.create_service_record(db, service_record)
+    if db_service_record is None:
+        # Nothing was inserted; work out which reference was missing
+        if not await crud.vehicle_exists(db, service_record.vehicle_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Vehicle with ID {service_record.vehicle_id} not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Service type with ID {service_record.service_type_id} not found"
         )
     
-    try:
-        return crud.create_service_record(db, service_record)
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
+    return db_service_record
 
 @router.get("/records", response_model=List[schemas.ServiceRecordDetailResponse])
-def list_all_service_records(
+async def list_all_service_records(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all service records with details and status
     """
-    records = crud.get_all_service_records(db, skip=skip, limit=limit)
-    return [build_service_detail_response(record, db) for record in records]
+    rows = await crud.get_all_service_records(db, skip=skip, limit=limit)
+    return [build_service_detail_response_from_row(row) for row in rows]
 
 @router.get("/records/overdue", response_model=List[schemas.ServiceRecordDetailResponse])
-def get_overdue_services(db: Session = Depends(get_db)):
+async def get_overdue_services(db: AsyncSession = Depends(get_db)):
     """
     Get all overdue service records
     Services where next_service_date < current date
     """
-    records = crud.get_overdue_services(db)
-    return [build_service_detail_response(record, db) for record in records]
+    rows = await crud.get_overdue_services(db)
+    return [build_service_detail_response_from_row(row) for row in rows]
 
 @router.get("/records/upcoming", response_model=List[schemas.ServiceRecordDetailResponse])
-def get_upcoming_services(
+async def get_upcoming_services(
     days: int = 30,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get upcoming services within specified days
     
     - **days**: Number of days to look ahead (default: 30)
     """
-    records = crud.get_upcoming_services(db, days_ahead=days)
-    return [build_service_detail_response(record, db) for record in records]
+    rows = await crud.get_upcoming_services(db, days_ahead=days)
+    return [build_service_detail_response_from_row(row) for row in rows]
+
+@router.get("/stats", response_model=schemas.ServiceStatsResponse)
+async def get_service_stats(db: AsyncSession = Depends(get_db)):
+    """
+    Get service record counters
+    Values may be up to 60 seconds old
+    """
+    return schemas.ServiceStatsResponse(
+        overdue_count=await crud.get_overdue_count(db)
+    )
 
 @router.get("/history/{vehicle_id}", response_model=schemas.ServiceHistoryResponse)
-def get_service_history(
+async def get_service_history(
     vehicle_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get complete service history for a specific vehicle
     Includes vehicle details and all service records with status
+    Supports If-None-Match (see crud.get_vehicle_history_version)
     """
-    # Validate vehicle exists
-    vehicle = crud.get_vehicle(db, vehicle_id)
+    version = await crud.get_vehicle_history_version(db, vehicle_id)
+    if version[0]:
+        not_modified = _not_modified(request, response, _etag(version))
+        if not_modified:
+            return not_modified
+    
+    # Load vehicle together with its service records
+    vehicle = await crud.get_vehicle_with_history(db, vehicle_id)
     if not vehicle:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Vehicle with ID {vehicle_id} not found"
         )
     
-    # Get service records
-    records = crud.get_service_records_by_vehicle(db, vehicle_id)
-    
-    return build_service_history(vehicle, records, db)
+    return build_service_history(vehicle)
 
 @router.get("/export/csv")
-def export_services_csv(db: Session = Depends(get_db)):
+async def export_services_csv(db: AsyncSession = Depends(get_db)):
     """
     Export all service records as CSV
     Returns CSV file for download
     """
-    records = crud.get_all_service_records(db, skip=0, limit=10000)
-    csv_data = generate_csv_data(records, db)
+    rows = await crud.get_all_service_records_stream(db, limit=10000)
     
-    return Response(
-        content=csv_data,
+    return StreamingResponse(
+        generate_csv_data(rows),
         media_type="text/csv",
         headers={
             "Content-Disposition": "attachment; filename=service_records.csv"
@@ -151,26 +195,24 @@ def export_services_csv(db: Session = Depends(get_db)):
     )
 
 @router.get("/export/{vehicle_id}/csv")
-def export_vehicle_services_csv(
+async def export_vehicle_services_csv(
     vehicle_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Export service records for a specific vehicle as CSV
     """
     # Validate vehicle exists
-    vehicle = crud.get_vehicle(db, vehicle_id)
-    if not vehicle:
+    if not await crud.vehicle_exists(db, vehicle_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Vehicle with ID {vehicle_id} not found"
         )
     
-    records = crud.get_service_records_by_vehicle(db, vehicle_id)
-    csv_data = generate_csv_data(records, db)
+    rows = await crud.get_all_service_records_stream(db, vehicle_id=vehicle_id)
     
-    return Response(
-        content=csv_data,
+    return StreamingResponse(
+        generate_csv_data(rows),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename=vehicle_{vehicle_id}_services.csv"
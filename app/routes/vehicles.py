@@ -3,7 +3,7 @@ Vehicle Routes
 REST API endpoints for vehicle management
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app import schemas, crud
 from app.database import get_db
@@ -11,9 +11,9 @@ from app.database import get_db
 router = APIRouter()
 
 @router.post("/", response_model=schemas.VehicleResponse, status_code=status.HTTP_201_CREATED)
-def create_vehicle(
+async def create_vehicle(
     vehicle: schemas.VehicleCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new vehicle
@@ -23,20 +23,20 @@ def create_vehicle(
     - **model**: Vehicle model (required)
     """
     # Check if vehicle number already exists
-    existing = crud.get_vehicle_by_number(db, vehicle.vehicle_number)
+    existing = await crud.get_vehicle_by_number(db, vehicle.vehicle_number)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Vehicle with number '{vehicle.vehicle_number}' already exists"
         )
     
-    return crud.create_vehicle(db, vehicle)
+    return await crud.create_vehicle(db, vehicle)
 
 @router.get("/", response_model=List[schemas.VehicleResponse])
-def list_vehicles(
+async def list_vehicles(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all vehicles
@@ -44,17 +44,17 @@ def list_vehicles(
     - **skip**: Number of records to skip (pagination)
     - **limit**: Maximum number of records to return
     """
-    return crud.get_vehicles(db, skip=skip, limit=limit)
+    return await crud.get_vehicles(db, skip=skip, limit=limit)
 
 @router.get("/{vehicle_id}", response_model=schemas.VehicleResponse)
-def get_vehicle(
+async def get_vehicle(
     vehicle_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a specific vehicle by ID
     """
-    vehicle = crud.get_vehicle(db, vehicle_id)
+    vehicle = await crud.get_vehicle(db, vehicle_id)
     if not vehicle:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -63,15 +63,15 @@ def get_vehicle(
     return vehicle
 
 @router.delete("/{vehicle_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_vehicle(
+async def delete_vehicle(
     vehicle_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a vehicle
     This will also delete all associated service records (cascade)
     """
-    success = crud.delete_vehicle(db, vehicle_id)
+    success = await crud.delete_vehicle(db, vehicle_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
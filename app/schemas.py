@@ -2,8 +2,8 @@
 Pydantic Schemas
 Request/response validation models for API endpoints
 """
-from pydantic import BaseModel, Field
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime, timezone
 from typing import Optional, List
 
 # ==================== Vehicle Schemas ====================
@@ -50,6 +50,14 @@ class ServiceRecordCreate(BaseModel):
     service_date: datetime = Field(..., description="Date service was performed")
     notes: Optional[str] = Field(None, description="Additional notes")
 
+    @field_validator("service_date")
+    @classmethod
+    def to_naive_utc(cls, value: datetime) -> datetime:
+        """Store timestamps as naive UTC; timestamp columns are timezone-less"""
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
 class ServiceRecordResponse(BaseModel):
     """Schema for service record response"""
     id: int
@@ -84,4 +92,8 @@ class ServiceRecordDetailResponse(BaseModel):
 class ServiceHistoryResponse(BaseModel):
     """Service history for a vehicle"""
     vehicle: VehicleResponse
-    service_records: List[ServiceRecordDetailResponse]
\ No newline at end of file
+    service_records: List[ServiceRecordDetailResponse]
+
+class ServiceStatsResponse(BaseModel):
+    """Service record counters for dashboards"""
+    overdue_count: int
@@ -2,81 +2,73 @@
 Business Logic Layer
 Handles service status calculation and data transformation
 """
-from datetime import datetime, timedelta
-from typing import List
-from sqlalchemy.orm import Session
+import csv
+from io import StringIO
+from typing import AsyncIterable, AsyncIterator
+from sqlalchemy.engine import Row
 from app import models, schemas
 
-def calculate_service_status(next_service_date: datetime) -> tuple[str, int]:
-    """
-    Calculate service status based on next service date
-    Returns: (status, days_until_due)
-    
-    Status values:
-    - OVERDUE: next_service_date is in the past
-    - DUE: next_service_date is today or within 7 days
-    - UPCOMING: next_service_date is more than 7 days away
-    """
-    now = datetime.utcnow()
-    days_until_due = (next_service_date - now).days
-    
-    if days_until_due < 0:
-        return "OVERDUE", days_until_due
-    elif days_until_due <= 7:
-        return "DUE", days_until_due
-    else:
-        return "UPCOMING", days_until_due
-
 def build_service_detail_response(
     service_record: models.ServiceRecord,
-    db: Session
+    vehicle: models.Vehicle
 ) -> schemas.ServiceRecordDetailResponse:
     """
-    Build detailed service record response with status calculation
+    Build detailed service record response
+    Status and days until due are computed by the query (see crud._status_options);
+    fields come from the database, so validation is skipped
     """
-    status, days_until = calculate_service_status(service_record.next_service_date)
-    
-    return schemas.ServiceRecordDetailResponse(
+    return schemas.ServiceRecordDetailResponse.model_construct(
         id=service_record.id,
         vehicle_id=service_record.vehicle_id,
-        vehicle_number=service_record.vehicle.vehicle_number,
-        owner_name=service_record.vehicle.owner_name,
-        model=service_record.vehicle.model,
+        vehicle_number=vehicle.vehicle_number,
+        owner_name=vehicle.owner_name,
+        model=vehicle.model,
         service_type_id=service_record.service_type_id,
         service_type_name=service_record.service_type.name,
         service_date=service_record.service_date,
         next_service_date=service_record.next_service_date,
         notes=service_record.notes,
-        status=status,
-        days_until_due=days_until
+        status=service_record.status,
+        days_until_due=service_record.days_until_due
     )
 
-def build_service_history(
-    vehicle: models.Vehicle,
-    service_records: List[models.ServiceRecord],
-    db: Session
-) -> schemas.ServiceHistoryResponse:
+def build_service_detail_response_from_row(row: Row) -> schemas.ServiceRecordDetailResponse:
+    """
+    Build detailed service record response from a flat detail row
+    (see crud.list_detailed_records); rows come straight from the database,
+    so validation is skipped
+    """
+    return schemas.ServiceRecordDetailResponse.model_construct(**row._mapping)
+
+def build_service_history(vehicle: models.Vehicle) -> schemas.ServiceHistoryResponse:
     """
     Build complete service history for a vehicle
+    Expects vehicle.service_records to be loaded (see crud.get_vehicle_with_history)
     """
     detailed_records = [
-        build_service_detail_response(record, db)
-        for record in service_records
+        build_service_detail_response(record, vehicle)
+        for record in vehicle.service_records
     ]
     
-    return schemas.ServiceHistoryResponse(
-        vehicle=schemas.VehicleResponse.from_orm(vehicle),
+    return schemas.ServiceHistoryResponse.model_construct(
+        vehicle=schemas.VehicleResponse.model_construct(
+            id=vehicle.id,
+            vehicle_number=vehicle.vehicle_number,
+            owner_name=vehicle.owner_name,
+            model=vehicle.model,
+            created_at=vehicle.created_at
+        ),
         service_records=detailed_records
     )
 
-def generate_csv_data(service_records: List[models.ServiceRecord], db: Session) -> str:
+# Data row format; text fields are always quoted, numbers, dates and status never need it
+_CSV_ROW_FORMAT = '%d,"%s","%s","%s","%s",%s,%s,%s,%d,"%s"\r\n'
+
+async def generate_csv_data(rows: AsyncIterable[Row], chunk_size: int = 1000) -> AsyncIterator[bytes]:
     """
-    Generate CSV data from service records
-    Returns CSV string with headers
+    Generate CSV data from flat export rows
+    Yields the header line, then one chunk of encoded CSV per chunk_size rows
     """
-    import csv
-    from io import StringIO
-    
     output = StringIO()
     writer = csv.writer(output)
     
@@ -93,21 +85,29 @@ def generate_csv_data(service_records: List[models.ServiceRecord], db: Session)
         "Days Until Due",
         "Notes"
     ])
+    yield output.getvalue().encode()
     
-    # Write data rows
-    for record in service_records:
-        status, days_until = calculate_service_status(record.next_service_date)
-        writer.writerow([
-            record.id,
-            record.vehicle.vehicle_number,
-            record.vehicle.owner_name,
-            record.vehicle.model,
-            record.service_type.name,
-            record.service_date.strftime("%Y-%m-%d %H:%M:%S"),
-            record.next_service_date.strftime("%Y-%m-%d %H:%M:%S"),
+    # Write data rows (unpacked in crud._detail_select column order)
+    lines = []
+    async for (
+        service_id, _, vehicle_number, owner_name, model, _, service_type_name,
+        service_date, next_service_date, notes, status, days_until_due
+    ) in rows:
+        lines.append(_CSV_ROW_FORMAT % (
+            service_id,
+            vehicle_number.replace('"', '""'),
+            owner_name.replace('"', '""'),
+            model.replace('"', '""'),
+            service_type_name.replace('"', '""'),
+            service_date.isoformat(" ", "seconds"),
+            next_service_date.isoformat(" ", "seconds"),
             status,
-            days_until,
-            record.notes or ""
-        ])
+            days_until_due,
+            notes.replace('"', '""') if notes else ""
+        ))
+        if len(lines) == chunk_size:
+            yield "".join(lines).encode()
+            lines.clear()
     
-    return output.getvalue()
+    if lines:
+        yield "".join(lines).encode()
@@ -1,36 +1,59 @@
 """
 RideCare Backend - Main Application Entry Point
 """
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from app.database import engine
 from app.routes import vehicles, services
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic: run `alembic upgrade head` before starting workers
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Dispose the engine's connection pool on shutdown"""
+    yield
+    await engine.dispose()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="RideCare API",
     description="Vehicle Maintenance Record System Backend",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
+# ALLOWED_ORIGINS is a comma-separated list of frontend origins; when unset,
+# no cross-origin requests are allowed. Credentials are never allowed with "*"
+ALLOWED_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("ALLOWED_ORIGINS", "").split(",")
+    if origin.strip()
+]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=ALLOWED_ORIGINS,
+    allow_credentials="*" not in ALLOWED_ORIGINS,
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["authorization", "content-type"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
+# Compress responses (including streamed CSV exports) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Include routers
 app.include_router(vehicles.router, prefix="/api/vehicles", tags=["Vehicles"])
 app.include_router(services.router, prefix="/api/services", tags=["Services"])
 
 @app.get("/")
-def root():
+async def root():
     """Health check endpoint"""
     return {
         "status": "online",
@@ -39,7 +62,7 @@ def root():
     }
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Detailed health check"""
     return {
         "status": "healthy",
@@ -0,0 +1,46 @@
+"""
+CORS tests
+Send a preflight request straight through the ASGI app
+"""
+import asyncio
+import main
+
+def preflight(origin: str) -> tuple[int, dict]:
+    """Send an OPTIONS preflight from origin; return (status, headers)"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "OPTIONS",
+        "scheme": "http",
+        "path": "/api/vehicles/",
+        "raw_path": b"/api/vehicles/",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"origin", origin.encode()),
+            (b"access-control-request-method", b"GET"),
+        ],
+        "client": ("127.0.0.1", 12345),
+        "server": ("testserver", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(main.app(scope, receive, send))
+    start = next(message for message in messages if message["type"] == "http.response.start")
+    headers = {key.decode(): value.decode() for key, value in start["headers"]}
+    return start["status"], headers
+
+def test_unset_allowed_origins_rejects_cross_origin_preflight():
+    # conftest.py clears ALLOWED_ORIGINS before main is imported
+    assert main.ALLOWED_ORIGINS == []
+    status, headers = preflight("http://x")
+    assert status == 400
+    assert "access-control-allow-origin" not in headers
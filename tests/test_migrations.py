@@ -0,0 +1,34 @@
+"""
+Migration tests
+Run the initial migration on an in-memory SQLite database
+"""
+import importlib.util
+from pathlib import Path
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, inspect
+from app.database import Base
+from app import models  # noqa: F401 - registers models on Base.metadata
+
+MIGRATION = Path(__file__).resolve().parent.parent / "alembic" / "versions" / "0001_initial_schema.py"
+
+def run_initial_upgrade(connection):
+    """Run 0001's upgrade() against connection"""
+    spec = importlib.util.spec_from_file_location("initial_schema", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with Operations.context(MigrationContext.configure(connection)):
+        migration.upgrade()
+
+def test_initial_migration_creates_tables():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        run_initial_upgrade(connection)
+        tables = set(inspect(connection).get_table_names())
+    assert {"vehicles", "service_types", "service_records"} <= tables
+
+def test_initial_migration_skips_tables_from_create_all():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        Base.metadata.create_all(connection)
+        run_initial_upgrade(connection)
@@ -0,0 +1,22 @@
+"""
+Schema tests
+"""
+from datetime import datetime
+from app import schemas
+
+def test_service_record_create_converts_aware_date_to_naive_utc():
+    record = schemas.ServiceRecordCreate(
+        vehicle_id=1,
+        service_type_id=1,
+        service_date="2024-01-01T05:30:00+05:30"
+    )
+    assert record.service_date == datetime(2024, 1, 1, 0, 0, 0)
+    assert record.service_date.tzinfo is None
+
+def test_service_record_create_keeps_naive_date():
+    record = schemas.ServiceRecordCreate(
+        vehicle_id=1,
+        service_type_id=1,
+        service_date="2024-01-01T00:00:00"
+    )
+    assert record.service_date == datetime(2024, 1, 1, 0, 0, 0)